@@ -10,11 +10,33 @@ Provides:
 
 import hashlib
 import hmac
+import queue
+import sys
+import threading
 import time
+import uuid
+import warnings
+from collections import OrderedDict, deque
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, make_response
 import os
-import json
+import orjson
+
+try:
+    import redis
+except ImportError:  # Redis is optional; rate limiting falls back to in-memory
+    redis = None
+
+# SHA-256 constructor used for request signatures. When it comes from the
+# OpenSSL-backed _hashlib module, hmac.digest takes its native fast path
+# (which uses SHA-NI / ARMv8 crypto instructions where available)
+_SHA256 = hashlib.sha256
+if _SHA256.__module__ != '_hashlib':
+    warnings.warn(
+        'hashlib is not OpenSSL-backed; HMAC signature checks will use the '
+        'slower builtin SHA-256 implementation',
+        RuntimeWarning
+    )
 
 # In production, these would come from AWS Secrets Manager
 # For demo purposes, we'll use environment variables
@@ -33,8 +55,57 @@ API_KEYS = {
     }
 }
 
-# Simple in-memory rate limiting (in production, use Redis/DynamoDB)
-rate_limit_store = {}
+# Pre-encode values used on every request so the hot path doesn't redo it
+for _key_info in API_KEYS.values():
+    _key_info['secret_bytes'] = _key_info['secret'].encode('utf-8')
+    _key_info['rate_limit_str'] = str(_key_info['rate_limit'])
+    _key_info['permissions_set'] = frozenset(_key_info.get('permissions', ()))
+
+# Simple in-memory rate limiting, used when Redis is not configured/reachable
+# Maps API key -> deque of request timestamps within the current window,
+# ordered least recently used first and capped at RATE_LIMIT_MAX_KEYS
+RATE_LIMIT_MAX_KEYS = 10000
+rate_limit_store = OrderedDict()
+
+# Shared rate limiting across Lambda containers (set RATE_LIMIT_REDIS_URL)
+RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL')
+
+# Sliding window on a sorted set: evict, count and record in one atomic call
+# KEYS[1] = rate limit key, ARGV = {now, window_start, limit, member}
+RATE_LIMIT_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', key, 0, ARGV[2])
+local count = redis.call('ZCARD', key)
+if count >= limit then
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    local reset_time = now + 60
+    if oldest[2] then
+        reset_time = tonumber(oldest[2]) + 60
+    end
+    return {0, 0, reset_time}
+end
+redis.call('ZADD', key, now, ARGV[4])
+redis.call('EXPIRE', key, 60)
+return {1, limit - count, now + 60}
+"""
+
+# After a Redis error, use the in-memory store for this many seconds instead
+# of paying the socket timeout on every request during an outage
+REDIS_FAILURE_COOLDOWN = 5
+_redis_retry_at = 0
+
+redis_client = None
+rate_limit_script = None
+if redis is not None and RATE_LIMIT_REDIS_URL:
+    redis_client = redis.Redis.from_url(
+        RATE_LIMIT_REDIS_URL,
+        socket_timeout=0.25,
+        socket_connect_timeout=0.25
+    )
+    # register_script uses EVALSHA, so the script body is only sent once
+    rate_limit_script = redis_client.register_script(RATE_LIMIT_LUA)
 
 def get_api_key_info(api_key):
     """Get information about an API key"""
@@ -47,61 +118,179 @@ def validate_signature(api_key, signature, timestamp, body):
     Client generates signature:
     signature = HMAC-SHA256(secret, timestamp + body)
     """
+    # A hex SHA-256 digest is always 64 characters; the length is public, so
+    # rejecting other lengths early leaks nothing and skips the HMAC
+    if len(signature) != 64:
+        return False
+
     key_info = get_api_key_info(api_key)
     if not key_info:
         return False
 
-    secret = key_info['secret']
+    try:
+        provided_sig = bytes.fromhex(signature)
+    except ValueError:
+        return False
 
-    # Create expected signature
+    # Create expected signature (one-shot HMAC, no intermediate HMAC object)
     message = f"{timestamp}{body}".encode('utf-8')
-    expected_sig = hmac.new(
-        secret.encode('utf-8'),
+    expected_sig = hmac.digest(
+        key_info['secret_bytes'],
         message,
-        hashlib.sha256
-    ).hexdigest()
+        _SHA256
+    )
 
-    return hmac.compare_digest(signature, expected_sig)
+    return hmac.compare_digest(provided_sig, expected_sig)
 
 def check_rate_limit(api_key):
     """
     Check if API key has exceeded rate limit
 
+    Uses Redis when configured so the limit holds across all containers,
+    falling back to the in-memory store if Redis is unavailable.
+
     Returns (allowed, remaining, reset_time)
     """
     key_info = get_api_key_info(api_key)
     if not key_info:
         return (False, 0, 0)
 
+    return check_rate_limit_with_info(key_info, api_key)
+
+def check_rate_limit_with_info(key_info, api_key):
+    """
+    Check rate limit for an API key whose info has already been looked up
+
+    Returns (allowed, remaining, reset_time)
+    """
+    global _redis_retry_at
+
     limit = key_info['rate_limit']
     now = int(time.time())
     window_start = now - 60  # 1 minute window
 
-    # Initialize if not exists
-    if api_key not in rate_limit_store:
-        rate_limit_store[api_key] = []
+    if rate_limit_script is not None and now >= _redis_retry_at:
+        try:
+            allowed, remaining, reset_time = rate_limit_script(
+                keys=[f"ratelimit:{api_key}"],
+                args=[now, window_start, limit, f"{now}:{uuid.uuid4().hex}"]
+            )
+            return (bool(allowed), int(remaining), int(reset_time))
+        except redis.RedisError:
+            _redis_retry_at = now + REDIS_FAILURE_COOLDOWN
+
+    return check_rate_limit_local(api_key, limit, now)
+
+def check_rate_limit_local(api_key, limit, now):
+    """
+    In-memory sliding window rate limit for a single container
+
+    Returns (allowed, remaining, reset_time)
+    """
+    window_start = now - 60  # 1 minute window
+
+    # Timestamps are appended in order, so expired ones are always at the left
+    timestamps = rate_limit_store.get(api_key)
+    if timestamps is None:
+        timestamps = rate_limit_store[api_key] = deque()
+        # Evict the least recently used keys so memory stays bounded
+        while len(rate_limit_store) > RATE_LIMIT_MAX_KEYS:
+            rate_limit_store.popitem(last=False)
+    else:
+        rate_limit_store.move_to_end(api_key)
 
     # Remove old timestamps
-    rate_limit_store[api_key] = [
-        ts for ts in rate_limit_store[api_key]
-        if ts > window_start
-    ]
+    while timestamps and timestamps[0] <= window_start:
+        timestamps.popleft()
 
-    current_count = len(rate_limit_store[api_key])
+    current_count = len(timestamps)
     remaining = max(0, limit - current_count)
 
     if current_count >= limit:
-        reset_time = rate_limit_store[api_key][0] + 60
+        reset_time = timestamps[0] + 60
         return (False, 0, reset_time)
 
     # Add current timestamp
-    rate_limit_store[api_key].append(now)
+    timestamps.append(now)
 
     return (True, remaining, now + 60)
 
+# Audit entries are serialized and written by a background thread, so the
+# request only pays for a queue put. The queue is bounded; when it is full
+# the request thread writes its entry itself rather than dropping it.
+AUDIT_QUEUE_MAXSIZE = 10000
+# Longest the Lambda handler waits for queued entries to be written
+AUDIT_FLUSH_TIMEOUT = 2.0
+_audit_queue = queue.Queue(maxsize=AUDIT_QUEUE_MAXSIZE)
+
+def _write_audit_entries(entries):
+    """Write a batch of audit entries to stdout as JSON lines in a single call"""
+    data = b''.join(
+        orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE) for entry in entries
+    )
+    stream = getattr(sys.stdout, 'buffer', None)
+    if stream is None:
+        sys.stdout.write(data.decode('utf-8'))
+        sys.stdout.flush()
+        return
+
+    # Flush pending text output first so lines stay in order
+    sys.stdout.flush()
+    stream.write(data)
+    stream.flush()
+
+def _write_audit_entries_safely(entries):
+    """Write a batch, reporting (not raising) errors so callers keep running"""
+    try:
+        _write_audit_entries(entries)
+    except Exception as e:
+        try:
+            sys.stderr.write(f"Failed to write {len(entries)} audit entries: {e!r}\n")
+        except Exception:
+            pass
+
+def _drain_queued_entries(entries):
+    """Move everything currently queued into entries without blocking"""
+    while True:
+        try:
+            entries.append(_audit_queue.get_nowait())
+        except queue.Empty:
+            return entries
+
+def _audit_log_worker():
+    while True:
+        entries = _drain_queued_entries([_audit_queue.get()])
+        _write_audit_entries_safely(entries)
+        # Mark the batch done only once it is written, so a flush
+        # waits for entries the worker has already taken
+        for _ in entries:
+            _audit_queue.task_done()
+
+threading.Thread(target=_audit_log_worker, name='api-audit-log', daemon=True).start()
+
+def flush_audit_log(timeout=AUDIT_FLUSH_TIMEOUT):
+    """
+    Wait until every queued audit entry has been written
+
+    Lambda freezes the container (and the writer thread) between
+    invocations, so the handler calls this before returning. The wait is
+    bounded so a stuck writer cannot hang the invocation.
+
+    Returns True if the queue was fully written, False on timeout.
+    """
+    deadline = time.monotonic() + timeout
+    with _audit_queue.all_tasks_done:
+        while _audit_queue.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            _audit_queue.all_tasks_done.wait(remaining)
+    return True
+
 def log_api_request(api_key, endpoint, status, response_time_ms):
     """Log API request for audit purposes"""
     log_entry = {
+        "stream": "audit",
         "timestamp": time.time(),
         "api_key": api_key,
         "endpoint": endpoint,
@@ -112,7 +301,10 @@ def log_api_request(api_key, endpoint, status, response_time_ms):
     }
 
     # In production, send to CloudWatch Logs or DynamoDB
-    print(f"[API_AUDIT] {json.dumps(log_entry)}")
+    try:
+        _audit_queue.put_nowait(log_entry)
+    except queue.Full:
+        _write_audit_entries_safely([log_entry])
 
 def require_api_key(check_signature=False):
     """
@@ -134,7 +326,7 @@ def require_api_key(check_signature=False):
     def decorator(f):
         @wraps(f)
         def wrapper(*args, **kwargs):
-            start_time = time.time()
+            start_ns = time.monotonic_ns()
 
             # Get API key from header
             api_key = request.headers.get('X-API-Key')
@@ -156,9 +348,9 @@ def require_api_key(check_signature=False):
                 }), 401
 
             # Check rate limit
-            allowed, remaining, reset_time = check_rate_limit(api_key)
+            allowed, remaining, reset_time = check_rate_limit_with_info(key_info, api_key)
             if not allowed:
-                response_time = (time.time() - start_time) * 1000
+                response_time = (time.monotonic_ns() - start_ns) / 1_000_000
                 log_api_request(api_key, request.path, 429, response_time)
                 return jsonify({
                     'error': 'Rate limit exceeded',
@@ -166,7 +358,7 @@ def require_api_key(check_signature=False):
                     'limit': key_info['rate_limit'],
                     'reset_time': reset_time
                 }), 429, {
-                    'X-RateLimit-Limit': str(key_info['rate_limit']),
+                    'X-RateLimit-Limit': key_info['rate_limit_str'],
                     'X-RateLimit-Remaining': '0',
                     'X-RateLimit-Reset': str(reset_time),
                     'Retry-After': str(reset_time - int(time.time()))
@@ -210,27 +402,29 @@ def require_api_key(check_signature=False):
                         'message': 'Request signature verification failed'
                     }), 401
 
-            # Add API key info to request context
+            # Add API key info to request context. API_KEYS entries carry a
+            # prebuilt permissions_set; key info from anywhere else gets one
+            # here (on a copy, so the caller's dict is left untouched)
+            if 'permissions_set' not in key_info:
+                key_info = {
+                    **key_info,
+                    'permissions_set': frozenset(key_info.get('permissions', ()))
+                }
             request.api_key_info = key_info
 
-            # Execute route function
-            response = f(*args, **kwargs)
+            # Execute route function (normalizes tuple/str/dict returns once)
+            response = make_response(f(*args, **kwargs))
 
             # Add rate limit headers
-            if isinstance(response, tuple):
-                data, status, headers = response if len(response) == 3 else (response[0], response[1], {})
-            else:
-                data, status, headers = response, 200, {}
-
-            headers['X-RateLimit-Limit'] = str(key_info['rate_limit'])
-            headers['X-RateLimit-Remaining'] = str(remaining)
-            headers['X-RateLimit-Reset'] = str(reset_time)
+            response.headers['X-RateLimit-Limit'] = key_info['rate_limit_str']
+            response.headers['X-RateLimit-Remaining'] = str(remaining)
+            response.headers['X-RateLimit-Reset'] = str(reset_time)
 
             # Log successful request
-            response_time = (time.time() - start_time) * 1000
-            log_api_request(api_key, request.path, status, response_time)
+            response_time = (time.monotonic_ns() - start_ns) / 1_000_000
+            log_api_request(api_key, request.path, response.status_code, response_time)
 
-            return data, status, headers
+            return response
 
         return wrapper
     return decorator
@@ -0,0 +1,21 @@
+"""
+AWS Lambda entry point
+
+EventBridge keep-warm pings ({"warmup": true}) are answered here without
+importing the Flask app, so they return immediately and never pay for
+Flask/Pydantic initialization. The app is imported on the first real
+request and reused for the life of the container.
+"""
+
+_app_handler = None
+
+def handler(event, context):
+    # Keep-warm ping: keep the container alive without doing real work
+    if event.get('warmup'):
+        return {'statusCode': 200, 'body': 'warm'}
+
+    global _app_handler
+    if _app_handler is None:
+        from main import handler as _app_handler
+
+    return _app_handler(event, context)
@@ -1,68 +1,134 @@
-from flask import Flask, jsonify, Blueprint, request, make_response
+from flask import Flask, Response, request
+from flask.json.provider import DefaultJSONProvider
+import orjson
 import os
-import json
+import io
+import re
+import sys
 import base64
-from pydantic import BaseModel, EmailStr, validator, Field
+from pydantic import BaseModel, ValidationError, field_validator, Field
 from typing import Optional
-from functools import wraps
-from auth import require_api_key  # API key authentication
+from functools import lru_cache, wraps
+from auth import require_api_key, flush_audit_log  # API key authentication
 
-app = Flask(__name__)
+# ==============================================================================
+# JSON PROVIDER
+# ==============================================================================
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider using orjson instead of the stdlib json module"""
+
+    def dumps(self, obj, **kwargs):
+        # Non-string keys are stringified, as the stdlib provider does
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+def _json(payload, status=200):
+    """Build a JSON response straight from orjson bytes (no str round-trip)"""
+    return Response(orjson.dumps(payload), status=status, mimetype='application/json')
 
 # ==============================================================================
 # SECURITY HEADERS MIDDLEWARE
 # ==============================================================================
 
-@app.after_request
-def add_security_headers(response):
-    """Add security headers to all responses"""
+# Header values are fixed, so the dict is built once and merged in one call;
+# update() replaces any value a route already set instead of duplicating it
+SECURITY_HEADERS = {
     # Prevent clickjacking attacks
-    response.headers['X-Frame-Options'] = 'DENY'
+    'X-Frame-Options': 'DENY',
 
     # Prevent MIME type sniffing
-    response.headers['X-Content-Type-Options'] = 'nosniff'
+    'X-Content-Type-Options': 'nosniff',
 
     # Enable XSS protection
-    response.headers['X-XSS-Protection'] = '1; mode=block'
+    'X-XSS-Protection': '1; mode=block',
 
     # Content Security Policy
-    response.headers['Content-Security-Policy'] = "default-src 'self'; script-src 'self'; style-src 'self' 'unsafe-inline'"
+    'Content-Security-Policy': "default-src 'self'; script-src 'self'; style-src 'self' 'unsafe-inline'",
 
     # Prevent sensitive data caching
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
+    'Cache-Control': 'no-store, no-cache, must-revalidate, max-age=0',
+    'Pragma': 'no-cache',
+    'Expires': '0',
+
+    # Enforce HTTPS (the API is only served over HTTPS)
+    'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
 
     # Referrer Policy
-    response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
+    'Referrer-Policy': 'strict-origin-when-cross-origin',
 
     # Permissions Policy (formerly Feature-Policy)
-    response.headers['Permissions-Policy'] = 'geolocation=(), microphone=(), camera=()'
+    'Permissions-Policy': 'geolocation=(), microphone=(), camera=()',
+}
 
+def add_security_headers(response):
+    """Add security headers to all responses"""
+    # Prebuilt responses already carry the headers
+    if getattr(response, 'prebuilt', False):
+        return response
+    response.headers.update(SECURITY_HEADERS)
+    return response
+
+def _prebuilt_json(body):
+    """
+    Build the complete response for a constant JSON endpoint once
+
+    The same object is returned on every request, so the view does no
+    serialization and the after_request hook has nothing to add.
+    """
+    response = Response(body, mimetype='application/json')
+    response.headers.update(SECURITY_HEADERS)
+    response.prebuilt = True
     return response
 
 # ==============================================================================
 # PYDANTIC MODELS FOR INPUT VALIDATION
 # ==============================================================================
 
+# Characters that are not allowed in names
+_FORBIDDEN_NAME_CHARS = re.compile(r'[<>&"\']')
+
+# Basic shape check for email addresses (local@domain.tld)
+_EMAIL = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')
+
+# Markup that is not allowed in free-text messages
+_DANGEROUS_MESSAGE = re.compile(r'<script|<iframe|javascript:', re.IGNORECASE)
+
 class UserInput(BaseModel):
     """Example Pydantic model for user input validation"""
     name: str = Field(..., min_length=1, max_length=100, description="User name")
-    email: EmailStr = Field(..., description="Valid email address")
+    email: str = Field(..., description="Valid email address")
     age: Optional[int] = Field(None, ge=0, le=150, description="User age")
     message: Optional[str] = Field(None, max_length=500, description="User message")
 
-    @validator('name')
+    @field_validator('name')
+    @classmethod
     def name_must_not_contain_special_chars(cls, v):
         """Prevent injection attacks in name field"""
-        if any(char in v for char in ['<', '>', '&', '"', "'"]):
+        if _FORBIDDEN_NAME_CHARS.search(v):
             raise ValueError('Name contains invalid characters')
         return v.strip()
 
-    @validator('message')
+    @field_validator('email')
+    @classmethod
+    def email_must_be_valid(cls, v):
+        """Validate email format"""
+        if not _EMAIL.fullmatch(v):
+            raise ValueError('Invalid email address')
+        return v
+
+    @field_validator('message')
+    @classmethod
     def message_sanitize(cls, v):
         """Sanitize message field"""
-        if v and any(char in v for char in ['<script', '<iframe', 'javascript:']):
+        if v and _DANGEROUS_MESSAGE.search(v):
             raise ValueError('Message contains potentially dangerous content')
         return v
 
@@ -82,203 +148,188 @@ def validate_json(model: BaseModel):
         @wraps(f)
         def wrapper(*args, **kwargs):
             try:
-                # Get JSON data from request
-                data = request.get_json(force=True)
-
-                # Validate with Pydantic
-                validated_data = model(**data)
-
-                # Add validated data to kwargs
-                kwargs['validated_data'] = validated_data
-
-                return f(*args, **kwargs)
-
-            except ValueError as e:
-                return jsonify({
+                # Parse and validate the raw body in a single pass
+                validated_data = model.model_validate_json(request.get_data(cache=False))
+
+            except ValidationError as e:
+                if any(error['type'] == 'json_invalid' for error in e.errors()):
+                    return _json({
+                        'error': 'Invalid JSON',
+                        'details': 'Request body must be valid JSON',
+                        'status': 'error'
+                    }, 400)
+                return _json({
                     'error': 'Validation failed',
                     'details': str(e),
                     'status': 'error'
-                }), 400
-            except Exception as e:
-                return jsonify({
-                    'error': 'Invalid JSON',
-                    'details': 'Request body must be valid JSON',
-                    'status': 'error'
-                }), 400
+                }, 400)
+
+            # Add validated data to kwargs
+            kwargs['validated_data'] = validated_data
+
+            return f(*args, **kwargs)
 
         return wrapper
     return decorator
 
 # ==============================================================================
-# APPLICATION ROUTES
+# APPLICATION FACTORY
 # ==============================================================================
 
-app = Flask(__name__)
+# Environment variables are fixed for the life of the container, so read
+# the reported values once instead of on every request
+APP_VERSION = os.getenv('APP_VERSION', 'dev')
+
+def create_app(environment='dev'):
+    """
+    Create the Flask app for an environment
+
+    Routes are served under /<environment>/ (e.g. /dev/, /staging/, /prod/)
+    and report that environment in their responses. Tests build their own
+    app with this instead of reloading the module.
+    """
+    # The API serves no static files, so skip the default /static route
+    app = Flask(__name__, static_folder=None)
+    app.json = OrjsonProvider(app)
+    app.after_request(add_security_headers)
 
-# Create a Blueprint (a group of routes)
-bp = Blueprint('api', __name__)
+    url_prefix = f"/{environment}"
 
-@bp.route('/')
-def home():
-    """Matches /<env>/ (with trailing slash)"""
-    return jsonify({
+    # Bodies of the static endpoints are serialized once per app
+    home_response = _prebuilt_json(orjson.dumps({
         'message': 'AWS Lambda CI/CD Pipeline',
         'status': 'Deployment Successful',
-        'environment': os.getenv('ENVIRONMENT', 'unknown'),
-        'version': os.getenv('APP_VERSION', 'dev')
-    })
+        'environment': environment,
+        'version': APP_VERSION
+    }))
 
-@bp.route('/health')
-def health():
-    """Matches /<env>/health"""
-    return jsonify({
+    health_response = _prebuilt_json(orjson.dumps({
         'status': 'healthy',
-        'environment': os.getenv('ENVIRONMENT', 'unknown')
-    }), 200
-
-@bp.route('/validate', methods=['POST'])
-@validate_json(UserInput)
-def validate_input(validated_data: UserInput):
-    """
-    Example endpoint demonstrating Pydantic input validation
-
-    POST /<env>/validate
-    {
-        "name": "John Doe",
-        "email": "john@example.com",
-        "age": 30,
-        "message": "Hello world"
-    }
-    """
-    return jsonify({
-        'status': 'success',
-        'message': 'Input validated successfully',
-        'data': {
-            'name': validated_data.name,
-            'email': validated_data.email,
-            'age': validated_data.age,
-            'message': validated_data.message
+        'environment': environment
+    }))
+
+    @app.route(f'{url_prefix}/')
+    def home():
+        """Matches /<env>/ (with trailing slash)"""
+        return home_response
+
+    @app.route(f'{url_prefix}/health')
+    def health():
+        """Matches /<env>/health"""
+        return health_response
+
+    @app.route(f'{url_prefix}/validate', methods=['POST'])
+    @validate_json(UserInput)
+    def validate_input(validated_data: UserInput):
+        """
+        Example endpoint demonstrating Pydantic input validation
+
+        POST /<env>/validate
+        {
+            "name": "John Doe",
+            "email": "john@example.com",
+            "age": 30,
+            "message": "Hello world"
         }
-    }), 200
-
-@bp.route('/items', methods=['GET'])
-def get_items():
-    """
-    Example endpoint with query parameter validation
-
-    GET /<env>/items?page=1&limit=10&search=test
-    """
-    try:
-        # Get query parameters
-        params = QueryParams(
-            page=request.args.get('page', 1),
-            limit=request.args.get('limit', 10),
-            search=request.args.get('search')
-        )
-
-        # Simulate data response
-        return jsonify({
+        """
+        return _json({
             'status': 'success',
-            'pagination': {
-                'page': params.page,
-                'limit': params.limit,
-                'search': params.search
-            },
-            'items': [
-                {'id': 1, 'name': 'Item 1'},
-                {'id': 2, 'name': 'Item 2'}
-            ]
-        }), 200
-
-    except ValueError as e:
-        return jsonify({
-            'error': 'Invalid query parameters',
-            'details': str(e)
-        }), 400
-
-@bp.route('/protected', methods=['GET'])
-@require_api_key()
-def protected_endpoint():
-    """
-    Example protected endpoint requiring API key authentication
-
-    Headers required:
-    - X-API-Key: your-api-key-here
-
-    GET /<env>/protected
-    """
-    # Access API key info added by the decorator
-    api_key_info = request.api_key_info
-
-    return jsonify({
-        'status': 'success',
-        'message': 'Access granted to protected resource',
-        'api_key_id': api_key_info['key_id'],
-        'permissions': api_key_info['permissions'],
-        'rate_limit_remaining': api_key_info.get('rate_limit_remaining', 'N/A')
-    }), 200
-
-@bp.route('/signed', methods=['POST'])
-@require_api_key(check_signature=True)
-@validate_json(UserInput)
-def signed_endpoint(validated_data: UserInput):
-    """
-    Example endpoint requiring both API key and HMAC signature
-
-    Headers required:
-    - X-API-Key: your-api-key-here
-    - X-Signature: HMAC-SHA256 signature of request body
-    - X-Timestamp: Unix timestamp (must be within 5 minutes)
-
-    POST /<env>/signed
-    {
-        "name": "John Doe",
-        "email": "john@example.com",
-        "age": 30,
-        "message": "Signed request"
-    }
-    """
-    api_key_info = request.api_key_info
-
-    return jsonify({
-        'status': 'success',
-        'message': 'Signed request verified successfully',
-        'api_key_id': api_key_info['key_id'],
-        'data': {
-            'name': validated_data.name,
-            'email': validated_data.email,
-            'age': validated_data.age,
-            'message': validated_data.message
-        },
-        'security': {
-            'signature_verified': True,
-            'timestamp_valid': True
+            'message': 'Input validated successfully',
+            'data': validated_data.model_dump(mode='json')
+        }, 200)
+
+    @app.route(f'{url_prefix}/items', methods=['GET'])
+    def get_items():
+        """
+        Example endpoint with query parameter validation
+
+        GET /<env>/items?page=1&limit=10&search=test
+        """
+        try:
+            # Get query parameters
+            params = QueryParams(
+                page=request.args.get('page', 1),
+                limit=request.args.get('limit', 10),
+                search=request.args.get('search')
+            )
+
+            # Simulate data response
+            return _json({
+                'status': 'success',
+                'pagination': {
+                    'page': params.page,
+                    'limit': params.limit,
+                    'search': params.search
+                },
+                'items': [
+                    {'id': 1, 'name': 'Item 1'},
+                    {'id': 2, 'name': 'Item 2'}
+                ]
+            }, 200)
+
+        except ValueError as e:
+            return _json({
+                'error': 'Invalid query parameters',
+                'details': str(e)
+            }, 400)
+
+    @app.route(f'{url_prefix}/protected', methods=['GET'])
+    @require_api_key()
+    def protected_endpoint():
+        """
+        Example protected endpoint requiring API key authentication
+
+        Headers required:
+        - X-API-Key: your-api-key-here
+
+        GET /<env>/protected
+        """
+        # Access API key info added by the decorator
+        api_key_info = request.api_key_info
+
+        return _json({
+            'status': 'success',
+            'message': 'Access granted to protected resource',
+            'api_key_id': api_key_info['key_id'],
+            'permissions': api_key_info['permissions'],
+            'rate_limit_remaining': api_key_info.get('rate_limit_remaining', 'N/A')
+        }, 200)
+
+    @app.route(f'{url_prefix}/signed', methods=['POST'])
+    @require_api_key(check_signature=True)
+    @validate_json(UserInput)
+    def signed_endpoint(validated_data: UserInput):
+        """
+        Example endpoint requiring both API key and HMAC signature
+
+        Headers required:
+        - X-API-Key: your-api-key-here
+        - X-Signature: HMAC-SHA256 signature of request body
+        - X-Timestamp: Unix timestamp (must be within 5 minutes)
+
+        POST /<env>/signed
+        {
+            "name": "John Doe",
+            "email": "john@example.com",
+            "age": 30,
+            "message": "Signed request"
         }
-    }), 200
-
-@bp.route('/admin/stats', methods=['GET'])
-@require_api_key()
-def admin_stats():
-    """
-    Example admin endpoint with permission checking
-
-    Headers required:
-    - X-API-Key: your-api-key-here (must have 'admin' permission)
+        """
+        api_key_info = request.api_key_info
 
-    GET /<env>/admin/stats
-    """
-    api_key_info = request.api_key_info
-
-    # Check for admin permission
-    if 'admin' not in api_key_info.get('permissions', []):
-        return jsonify({
-            'error': 'Insufficient permissions',
-            'required': ['admin'],
-            'current': api_key_info.get('permissions', [])
-        }), 403
-
-    # Return admin statistics
-    return jsonify({
+        return _json({
+            'status': 'success',
+            'message': 'Signed request verified successfully',
+            'api_key_id': api_key_info['key_id'],
+            'data': validated_data.model_dump(mode='json'),
+            'security': {
+                'signature_verified': True,
+                'timestamp_valid': True
+            }
+        }, 200)
+
+    # Example statistics are static, so the success body is serialized once
+    admin_stats_body = orjson.dumps({
         'status': 'success',
         'stats': {
             'total_requests': 12345,
@@ -286,35 +337,46 @@ def admin_stats():
             'avg_response_time_ms': 145,
             'active_api_keys': 5
         },
-        'environment': os.getenv('ENVIRONMENT', 'unknown')
-    }), 200
+        'environment': environment
+    })
 
-# 1. Get the environment name (e.g., "dev", "staging", "prod")
-# Default to 'dev' for local development if not specified
-env_name = os.getenv('ENVIRONMENT', 'dev')
+    @app.route(f'{url_prefix}/admin/stats', methods=['GET'])
+    @require_api_key()
+    def admin_stats():
+        """
+        Example admin endpoint with permission checking
+
+        Headers required:
+        - X-API-Key: your-api-key-here (must have 'admin' permission)
 
-# Log the environment for debugging
-print(f"Application starting with ENVIRONMENT={env_name}")
+        GET /<env>/admin/stats
+        """
+        api_key_info = request.api_key_info
 
-# 2. Register the routes with the environment prefix
-# This makes the routes available at /{env_name}/ (e.g., /dev/, /staging/, /prod/)
-app.register_blueprint(bp, url_prefix=f"/{env_name}")
+        # Check for admin permission (permissions_set is attached by require_api_key)
+        if 'admin' not in api_key_info['permissions_set']:
+            return _json({
+                'error': 'Insufficient permissions',
+                'required': ['admin'],
+                'current': api_key_info.get('permissions', [])
+            }, 403)
 
-# 3. Root route returns API information and available paths
-@app.route('/')
-def root():
-    return jsonify({
+        # Return admin statistics
+        return Response(admin_stats_body, status=200, mimetype='application/json')
+
+    # Root route returns API information and available paths
+    root_response = _prebuilt_json(orjson.dumps({
         'message': 'API Gateway for AWS Lambda CI/CD Pipeline',
-        'environment': env_name,
-        'version': os.getenv('APP_VERSION', 'dev'),
+        'environment': environment,
+        'version': APP_VERSION,
         'endpoints': {
-            'home': f'/{env_name}/',
-            'health': f'/{env_name}/health',
-            'validate': f'/{env_name}/validate (POST)',
-            'items': f'/{env_name}/items?page=1&limit=10',
-            'protected': f'/{env_name}/protected (requires X-API-Key)',
-            'signed': f'/{env_name}/signed (requires X-API-Key + X-Signature)',
-            'admin_stats': f'/{env_name}/admin/stats (requires admin permission)'
+            'home': f'/{environment}/',
+            'health': f'/{environment}/health',
+            'validate': f'/{environment}/validate (POST)',
+            'items': f'/{environment}/items?page=1&limit=10',
+            'protected': f'/{environment}/protected (requires X-API-Key)',
+            'signed': f'/{environment}/signed (requires X-API-Key + X-Signature)',
+            'admin_stats': f'/{environment}/admin/stats (requires admin permission)'
         },
         'security': {
             'authentication': 'API Key (X-API-Key header)',
@@ -322,8 +384,24 @@ def root():
             'rate_limiting': 'Per API key',
             'waf': 'AWS WAF enabled'
         },
-        'hint': f'Try accessing /{env_name}/ for the main API endpoint'
-    })
+        'hint': f'Try accessing /{environment}/ for the main API endpoint'
+    }))
+
+    @app.route('/')
+    def root():
+        return root_response
+
+    return app
+
+# Get the environment name (e.g., "dev", "staging", "prod")
+# Default to 'dev' for local development if not specified
+env_name = os.getenv('ENVIRONMENT', 'dev')
+
+# Log the environment for debugging (opt-in, keeps cold start output quiet)
+if os.getenv('DEBUG_STARTUP'):
+    print(f"Application starting with ENVIRONMENT={env_name}")
+
+app = create_app(env_name)
 
 if __name__ == '__main__':
     # Only runs when testing locally on your machine
@@ -331,58 +409,96 @@ if __name__ == '__main__':
 
 # ENTRY POINT FOR AWS LAMBDA
 # Custom WSGI adapter for Flask on Lambda
+
+# WSGI environ entries that are the same for every invocation; the handler
+# copies this instead of rebuilding the whole dict per request
+_BASE_ENVIRON = {
+    'SCRIPT_NAME': '',
+    'SERVER_PORT': '443',
+    'SERVER_PROTOCOL': 'HTTP/1.1',
+    'wsgi.version': (1, 0),
+    'wsgi.url_scheme': 'https',
+    'wsgi.errors': sys.stderr,
+    'wsgi.multithread': False,
+    'wsgi.multiprocess': False,
+    'wsgi.run_once': False,
+}
+
+# Upper-cases a header name and maps '-' to '_' in a single pass
+_HEADER_KEY_TRANS = str.maketrans(
+    '-abcdefghijklmnopqrstuvwxyz',
+    '_ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+)
+
+@lru_cache(maxsize=256)
+def _environ_header_key(name):
+    """Map a header name to its WSGI environ key (cached, names repeat)"""
+    return 'HTTP_' + name.translate(_HEADER_KEY_TRANS)
+
 def handler(event, context):
     # Extract request details from Lambda event (API Gateway format)
-    http_method = event.get('requestContext', {}).get('http', {}).get('method', 'GET')
+    http_context = event.get('requestContext', {}).get('http', {})
+    http_method = http_context.get('method', 'GET')
     path = event.get('rawPath', '/')
     headers = event.get('headers', {})
     query_string = event.get('rawQueryString', '')
-    body = event.get('body', '')
+    body = event.get('body') or ''
     is_base64 = event.get('isBase64Encoded', False)
 
-    # Decode body if base64 encoded
-    if is_base64 and body:
-        body = base64.b64decode(body).decode('utf-8')
+    # Normalize the body to bytes once: base64 bodies decode straight to
+    # bytes, plain bodies are encoded a single time
+    if is_base64:
+        body_bytes = base64.b64decode(body)
+    else:
+        body_bytes = body.encode('utf-8')
 
     # Create WSGI environ
-    environ = {
+    environ = _BASE_ENVIRON.copy()
+    environ.update({
         'REQUEST_METHOD': http_method,
-        'SCRIPT_NAME': '',
         'PATH_INFO': path,
         'QUERY_STRING': query_string,
         'CONTENT_TYPE': headers.get('content-type', ''),
-        'CONTENT_LENGTH': str(len(body)) if body else '0',
+        'CONTENT_LENGTH': str(len(body_bytes)),
         'SERVER_NAME': headers.get('host', 'lambda'),
-        'SERVER_PORT': '443',
-        'SERVER_PROTOCOL': 'HTTP/1.1',
-        'wsgi.version': (1, 0),
-        'wsgi.url_scheme': 'https',
-        'wsgi.input': body,
-        'wsgi.errors': '',
-        'wsgi.multithread': False,
-        'wsgi.multiprocess': False,
-        'wsgi.run_once': False,
-    }
+        'REMOTE_ADDR': http_context.get('sourceIp', ''),
+        'wsgi.input': io.BytesIO(body_bytes),
+    })
 
     # Add HTTP headers to environ
-    for key, value in headers.items():
-        key = 'HTTP_' + key.upper().replace('-', '_')
-        environ[key] = value
-
-    # Call Flask app with test client
-    with app.test_client() as client:
-        response = client.open(
-            path=path,
-            method=http_method,
-            headers=headers,
-            query_string=query_string,
-            data=body
-        )
-
-        # Convert Flask response to Lambda response format
-        return {
-            'statusCode': response.status_code,
-            'headers': dict(response.headers),
-            'body': response.get_data(as_text=True),
-            'isBase64Encoded': False
-        }
\ No newline at end of file
+    environ.update({_environ_header_key(key): value for key, value in headers.items()})
+
+    # Call the Flask WSGI app directly (no test client round-trip)
+    response_start = {}
+
+    def start_response(status, response_headers, exc_info=None):
+        response_start['status'] = status
+        response_start['headers'] = response_headers
+
+    app_iter = app.wsgi_app(environ, start_response)
+    try:
+        response_body = b''.join(app_iter)
+    finally:
+        if hasattr(app_iter, 'close'):
+            app_iter.close()
+        flush_audit_log()
+
+    # Convert WSGI response to Lambda response format
+    response_headers = dict(response_start['headers'])
+    content_type = response_headers.get('Content-Type', '')
+
+    # JSON/text bodies go out as-is; anything else is passed through base64
+    # so binary payloads survive API Gateway intact
+    if content_type.startswith('text/') or 'json' in content_type:
+        is_base64 = False
+        response_body = response_body.decode('utf-8')
+    else:
+        is_base64 = True
+        response_body = base64.b64encode(response_body).decode('ascii')
+
+    return {
+        'statusCode': int(response_start['status'].split(' ', 1)[0]),
+        'headers': response_headers,
+        'body': response_body,
+        'isBase64Encoded': is_base64
+    }
@@ -6,11 +6,22 @@ Analyzes Locust test results and generates performance reports
 
 import json
 import sys
-import csv
 from datetime import datetime
 from pathlib import Path
 
-def analyze_locust_stats(stats_file):
+import pandas as pd
+
+# Columns used from the Locust stats CSV
+STATS_COLUMNS = ['Type', 'Name', 'Request Count', 'Failure Count', 'Average Response Time', '95%']
+
+def load_locust_stats(stats_file):
+    """Read the Locust stats CSV once, with numeric columns parsed in C"""
+    stats = pd.read_csv(stats_file, usecols=STATS_COLUMNS)
+    numeric = ['Request Count', 'Failure Count', 'Average Response Time', '95%']
+    stats[numeric] = stats[numeric].fillna(0)
+    return stats
+
+def analyze_locust_stats(stats, stats_file):
     """Analyze Locust statistics and generate performance report"""
 
     print("=" * 80)
@@ -21,17 +32,12 @@ def analyze_locust_stats(stats_file):
     print("=" * 80)
     print()
 
-    # Read CSV stats
-    with open(stats_file, 'r') as f:
-        reader = csv.DictReader(f)
-        stats = list(reader)
-
     # Filter out aggregated rows
-    endpoint_stats = [s for s in stats if s['Type'] != 'Aggregated']
+    endpoint_stats = stats[stats['Type'] != 'Aggregated']
 
     # Calculate overall metrics
-    total_requests = sum(int(s['Request Count']) for s in endpoint_stats)
-    total_failures = sum(int(s['Failure Count']) for s in endpoint_stats)
+    total_requests = int(endpoint_stats['Request Count'].sum())
+    total_failures = int(endpoint_stats['Failure Count'].sum())
 
     if total_requests > 0:
         failure_rate = (total_failures / total_requests) * 100
@@ -51,12 +57,14 @@ def analyze_locust_stats(stats_file):
     print(f"{'Endpoint':<40} {'Requests':<12} {'Avg (ms)':<12} {'P95 (ms)':<12} {'Failures'}")
     print("-" * 80)
 
-    for stat in endpoint_stats:
-        endpoint = stat['Name'][:38]
-        requests = int(stat['Request Count'])
-        avg_response = float(stat['Average Response Time']) if stat['Average Response Time'] else 0
-        p95_response = float(stat['95%']) if stat['95%'] else 0
-        failures = int(stat['Failure Count'])
+    for name, requests, failures, avg_response, p95_response in zip(
+        endpoint_stats['Name'],
+        endpoint_stats['Request Count'].astype(int),
+        endpoint_stats['Failure Count'].astype(int),
+        endpoint_stats['Average Response Time'],
+        endpoint_stats['95%']
+    ):
+        endpoint = name[:38]
 
         # Color coding based on performance
         status = "✅" if avg_response < 500 and failures == 0 else "⚠️" if avg_response < 1000 else "❌"
@@ -77,11 +85,12 @@ def analyze_locust_stats(stats_file):
     }
 
     # Get aggregate stats
-    agg_stats = next((s for s in stats if s['Type'] == 'Aggregated'), None)
+    agg_rows = stats[stats['Type'] == 'Aggregated']
 
-    if agg_stats:
-        avg_response = float(agg_stats['Average Response Time']) if agg_stats['Average Response Time'] else 0
-        p95_response = float(agg_stats['95%']) if agg_stats['95%'] else 0
+    if not agg_rows.empty:
+        agg_stats = agg_rows.iloc[0]
+        avg_response = float(agg_stats['Average Response Time'])
+        p95_response = float(agg_stats['95%'])
         availability = 100 - failure_rate
 
         results = {
@@ -128,26 +137,22 @@ def analyze_locust_stats(stats_file):
 
     return 0
 
-def generate_recommendations(stats_file):
+def generate_recommendations(stats):
     """Generate performance improvement recommendations"""
 
     print()
     print("💡 RECOMMENDATIONS")
     print("-" * 80)
 
-    with open(stats_file, 'r') as f:
-        reader = csv.DictReader(f)
-        stats = list(reader)
-
-    endpoint_stats = [s for s in stats if s['Type'] != 'Aggregated']
+    endpoint_stats = stats[stats['Type'] != 'Aggregated']
 
     recommendations = []
 
-    for stat in endpoint_stats:
-        endpoint = stat['Name']
-        avg_response = float(stat['Average Response Time']) if stat['Average Response Time'] else 0
-        failures = int(stat['Failure Count'])
-
+    for endpoint, avg_response, failures in zip(
+        endpoint_stats['Name'],
+        endpoint_stats['Average Response Time'],
+        endpoint_stats['Failure Count'].astype(int)
+    ):
         if avg_response > 1000:
             recommendations.append(f"🔴 {endpoint}: High latency ({avg_response:.0f}ms) - consider caching or optimization")
         elif avg_response > 500:
@@ -176,8 +181,9 @@ if __name__ == '__main__':
         sys.exit(1)
 
     try:
-        exit_code = analyze_locust_stats(stats_file)
-        generate_recommendations(stats_file)
+        stats = load_locust_stats(stats_file)
+        exit_code = analyze_locust_stats(stats, stats_file)
+        generate_recommendations(stats)
         sys.exit(exit_code)
     except Exception as e:
         print(f"Error analyzing stats: {e}")
@@ -63,7 +63,12 @@ cd ..
 if ! command -v pytest &> /dev/null; then
     echo -e "${YELLOW}⚠ pytest not installed, skipping tests${NC}"
 else
-    run_test "Unit tests" "pytest tests/test_*.py -v"
+    # Run in parallel when pytest-xdist is installed
+    PYTEST_ARGS=""
+    if python -c "import xdist" &> /dev/null; then
+        PYTEST_ARGS="-n auto --dist=loadscope"
+    fi
+    run_test "Unit tests" "pytest tests/test_*.py -v $PYTEST_ARGS"
 fi
 
 # Check if flake8 is installed
@@ -0,0 +1,28 @@
+"""
+Shared pytest fixtures
+"""
+import pytest
+
+
+@pytest.fixture(scope="session")
+def app():
+    """
+    Creates a test version of your application, shared by the whole session
+    Routes are served under /test/
+    """
+    from main import create_app
+
+    # Build an app for the test environment (no module reload needed)
+    test_app = create_app('test')
+    test_app.config['TESTING'] = True
+    return test_app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    """
+    Test client for the shared app
+    You can make requests to it without running a real server
+    """
+    with app.test_client() as client:
+        yield client
@@ -1,25 +1,6 @@
 import pytest
-import os
-from app.main import app
 
-@pytest.fixture
-def client(monkeypatch):
-    """
-    Creates a test version of your application
-    You can make requests to it without running a real server
-    """
-    # Set test environment variable
-    monkeypatch.setenv('ENVIRONMENT', 'test')
-
-    # Need to reimport to pick up the new environment variable
-    from importlib import reload
-    import app.main as main_module
-    reload(main_module)
-
-    test_app = main_module.app
-    test_app.config['TESTING'] = True
-    with test_app.test_client() as client:
-        yield client
+pytestmark = pytest.mark.unit
 
 def test_home(client):
     """
@@ -48,3 +29,10 @@ def test_health(client):
     assert json_data is not None
     assert json_data['status'] == 'healthy'
     assert json_data['environment'] == 'test'
+
+def test_jsonify_non_string_keys(app):
+    """
+    Test jsonify stringifies non-string dict keys like the stdlib provider
+    """
+    with app.app_context():
+        assert app.json.loads(app.json.dumps({1: 'a', 'b': 2})) == {'1': 'a', 'b': 2}
@@ -6,14 +6,30 @@ import json
 import time
 import hmac
 import hashlib
+import threading
+from collections import deque
+from functools import lru_cache
 from unittest.mock import patch, MagicMock
-import sys
-import os
 
-# Add app directory to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+from auth import (
+    require_api_key, get_api_key_info, validate_signature, check_rate_limit,
+    log_api_request, flush_audit_log
+)
 
-from auth import require_api_key, get_api_key_info, validate_signature, check_rate_limit
+pytestmark = pytest.mark.unit
+
+
+@lru_cache(maxsize=None)
+def _signer(secret):
+    """Keyed HMAC-SHA256 state for a secret (key pads are computed once)"""
+    return hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256)
+
+
+def _sign(secret, timestamp, body):
+    """Compute the hex HMAC-SHA256 signature a client sends for timestamp + body"""
+    signer = _signer(secret).copy()
+    signer.update(f"{timestamp}{body}".encode('utf-8'))
+    return signer.hexdigest()
 
 
 class TestAPIKeyValidation:
@@ -46,12 +62,7 @@ class TestSignatureValidation:
         secret = 'test-secret-key-67890'
 
         # Create valid signature
-        message = f"{timestamp}{body}".encode('utf-8')
-        signature = hmac.new(
-            secret.encode('utf-8'),
-            message,
-            hashlib.sha256
-        ).hexdigest()
+        signature = _sign(secret, timestamp, body)
 
         result = validate_signature(api_key, signature, timestamp, body)
 
@@ -102,10 +113,58 @@ class TestRateLimiting:
         assert remaining == 0
         assert reset_time == 0
 
-    def test_check_rate_limit_exceeded(self):
+    def test_check_rate_limit_exceeded(self, monkeypatch):
         """Test rate limit check when limit is exceeded"""
         api_key = 'test-api-key-12345'
 
+        # Freeze the clock so the window can't roll over mid-test
+        now = 1_700_000_000
+        monkeypatch.setattr('auth.time.time', lambda: float(now))
+
+        # Fill the window directly (100 requests for free tier)
+        from auth import rate_limit_store
+        rate_limit_store.clear()
+        rate_limit_store[api_key] = deque([now] * 100)
+
+        allowed, remaining, reset_time = check_rate_limit(api_key)
+
+        assert allowed is False
+        assert remaining == 0
+        assert reset_time == now + 60
+
+    def test_rate_limit_store_evicts_least_recently_used(self, monkeypatch):
+        """Test the in-memory store drops the least recently used key when full"""
+        from auth import check_rate_limit_local, rate_limit_store
+        monkeypatch.setattr('auth.RATE_LIMIT_MAX_KEYS', 2)
+        rate_limit_store.clear()
+        now = 1_700_000_000
+
+        check_rate_limit_local('key-a', 100, now)
+        check_rate_limit_local('key-b', 100, now)
+        # Touching key-a makes key-b the least recently used
+        check_rate_limit_local('key-a', 100, now + 1)
+        check_rate_limit_local('key-c', 100, now + 2)
+
+        assert list(rate_limit_store) == ['key-a', 'key-c']
+
+    def test_rate_limit_window_slides(self):
+        """Test timestamps older than the window are popped before counting"""
+        from auth import check_rate_limit_local, rate_limit_store
+        rate_limit_store.clear()
+        now = 1_700_000_000
+        rate_limit_store['key-a'] = deque([now - 61, now - 60, now - 59, now - 1])
+
+        allowed, remaining, reset_time = check_rate_limit_local('key-a', 3, now)
+
+        # Only now - 59 and now - 1 are still inside the window
+        assert (allowed, remaining, reset_time) == (True, 1, now + 60)
+        assert list(rate_limit_store['key-a']) == [now - 59, now - 1, now]
+
+    @pytest.mark.slow
+    def test_check_rate_limit_exceeded_end_to_end(self):
+        """Test rate limit is reached by making requests up to the limit"""
+        api_key = 'test-api-key-12345'
+
         # Clear any existing rate limit data
         from auth import rate_limit_store
         rate_limit_store.clear()
@@ -119,3 +178,109 @@ class TestRateLimiting:
 
         assert allowed is False
         assert remaining == 0
+
+
+class TestRedisRateLimiting:
+    """Test the Redis-backed rate limiter with a stubbed Lua script"""
+
+    API_KEY = 'test-api-key-12345'
+    NOW = 1_700_000_000
+
+    @pytest.fixture
+    def script_calls(self, monkeypatch):
+        """Freeze the clock, reset the Redis cooldown and record script calls"""
+        import auth
+        monkeypatch.setattr('auth.time.time', lambda: float(self.NOW))
+        monkeypatch.setattr(auth, '_redis_retry_at', 0)
+        auth.rate_limit_store.clear()
+        return []
+
+    def _stub_script(self, monkeypatch, calls, result):
+        def script(keys, args):
+            calls.append((keys, args))
+            if isinstance(result, Exception):
+                raise result
+            return result
+        monkeypatch.setattr('auth.rate_limit_script', script)
+
+    def test_redis_allows_request(self, monkeypatch, script_calls):
+        """Test an allow result from the script is returned as a tuple"""
+        self._stub_script(monkeypatch, script_calls, [1, 99, self.NOW + 60])
+
+        assert check_rate_limit(self.API_KEY) == (True, 99, self.NOW + 60)
+        check_rate_limit(self.API_KEY)
+
+        (keys, args), (_, second_args) = script_calls
+        assert keys == [f'ratelimit:{self.API_KEY}']
+        assert args[:3] == [self.NOW, self.NOW - 60, 100]
+        # Each request gets its own sorted-set member, even within one second
+        assert args[3].startswith(f'{self.NOW}:')
+        assert args[3] != second_args[3]
+
+    def test_redis_rejects_request(self, monkeypatch, script_calls):
+        """Test a reject result from the script is returned as a tuple"""
+        self._stub_script(monkeypatch, script_calls, [0, 0, self.NOW + 30])
+
+        assert check_rate_limit(self.API_KEY) == (False, 0, self.NOW + 30)
+
+    def test_redis_error_falls_back_to_local(self, monkeypatch, script_calls):
+        """Test a Redis error falls back to the in-memory store and backs off"""
+        redis = pytest.importorskip('redis')
+        import auth
+        self._stub_script(monkeypatch, script_calls, redis.ConnectionError('down'))
+
+        allowed, remaining, reset_time = check_rate_limit(self.API_KEY)
+
+        assert (allowed, remaining, reset_time) == (True, 100, self.NOW + 60)
+        assert list(auth.rate_limit_store[self.API_KEY]) == [self.NOW]
+        assert len(script_calls) == 1
+
+        # Redis is skipped until the cooldown has passed
+        check_rate_limit(self.API_KEY)
+        assert len(script_calls) == 1
+
+        later = self.NOW + auth.REDIS_FAILURE_COOLDOWN
+        monkeypatch.setattr('auth.time.time', lambda: float(later))
+        check_rate_limit(self.API_KEY)
+        assert len(script_calls) == 2
+
+
+class TestAuditLog:
+    """Test the background audit log writer"""
+
+    def test_flush_survives_write_error(self, app, monkeypatch):
+        """Test a failed write is reported and the writer keeps running"""
+        import auth
+        written = []
+
+        def write(entries):
+            if not written:
+                written.append(None)
+                raise OSError(32, 'Broken pipe')
+            written.extend(entries)
+        monkeypatch.setattr(auth, '_write_audit_entries', write)
+
+        with app.test_request_context('/', environ_base={'REMOTE_ADDR': '203.0.113.7'}):
+            log_api_request('key-1', '/test/protected', 200, 1.0)
+            assert flush_audit_log(timeout=1) is True
+
+            log_api_request('key-2', '/test/protected', 200, 1.0)
+            assert flush_audit_log(timeout=1) is True
+
+        assert [entry['api_key'] for entry in written[1:]] == ['key-2']
+        assert written[1]['ip'] == '203.0.113.7'
+
+    def test_flush_wait_is_bounded(self, app, monkeypatch):
+        """Test flush gives up after its timeout while a write is stuck"""
+        import auth
+        release = threading.Event()
+        monkeypatch.setattr(auth, '_write_audit_entries', lambda entries: release.wait(5))
+
+        with app.test_request_context('/'):
+            log_api_request('key-1', '/test/protected', 200, 1.0)
+
+        try:
+            assert flush_audit_log(timeout=0.05) is False
+        finally:
+            release.set()
+        assert flush_audit_log(timeout=1) is True
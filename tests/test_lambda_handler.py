@@ -0,0 +1,125 @@
+"""
+Tests for the Lambda entry point and the event-to-WSGI adapter
+"""
+import base64
+import sys
+
+import orjson
+import pytest
+from flask import Flask, Response, request
+
+import lambda_handler
+import main
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def echo_app(monkeypatch):
+    """Swap the module app for one that reports what the adapter passed in"""
+    echo = Flask(__name__)
+
+    @echo.route('/echo', methods=['GET', 'POST'])
+    def echo_request():
+        return {
+            'method': request.method,
+            'query': request.query_string.decode(),
+            'body': request.get_data(as_text=True),
+            'content_type': request.environ.get('CONTENT_TYPE'),
+            'content_length': request.environ.get('CONTENT_LENGTH'),
+            'custom': request.environ.get('HTTP_X_CUSTOM_HEADER'),
+            'remote_addr': request.remote_addr,
+        }
+
+    @echo.route('/binary')
+    def binary():
+        return Response(b'\x89PNG\x00\xff', mimetype='image/png')
+
+    @echo.route('/created', methods=['POST'])
+    def created():
+        return {'status': 'created'}, 201
+
+    monkeypatch.setattr(main, 'app', echo)
+    return echo
+
+
+def _event(path, method='GET', body=None, is_base64=False, headers=None):
+    """Build an API Gateway HTTP API (payload v2) event"""
+    return {
+        'rawPath': path,
+        'rawQueryString': 'page=2',
+        'headers': headers or {},
+        'requestContext': {'http': {'method': method, 'sourceIp': '203.0.113.7'}},
+        'body': body,
+        'isBase64Encoded': is_base64,
+    }
+
+
+class TestWarmup:
+    """Test keep-warm pings are answered without loading the app"""
+
+    def test_warmup_does_not_import_main(self, monkeypatch):
+        """Test a warmup event returns before main is imported"""
+        monkeypatch.setattr(lambda_handler, '_app_handler', None)
+        # A None entry makes any `import main` raise ImportError
+        monkeypatch.setitem(sys.modules, 'main', None)
+
+        response = lambda_handler.handler({'warmup': True}, None)
+
+        assert response == {'statusCode': 200, 'body': 'warm'}
+        assert lambda_handler._app_handler is None
+
+
+class TestEventToWSGI:
+    """Test API Gateway events are mapped onto the WSGI environ"""
+
+    def test_plain_body_reaches_wsgi_input(self, echo_app):
+        """Test a plain text body is passed through unchanged"""
+        response = main.handler(_event('/echo', 'POST', body='{"a": "é"}'), None)
+
+        assert response['statusCode'] == 200
+        assert response['isBase64Encoded'] is False
+        data = orjson.loads(response['body'])
+        assert data['method'] == 'POST'
+        assert data['body'] == '{"a": "é"}'
+        assert data['content_length'] == str(len('{"a": "é"}'.encode('utf-8')))
+
+    def test_base64_body_is_decoded(self, echo_app):
+        """Test a base64 encoded body is decoded before reaching the app"""
+        encoded = base64.b64encode(b'hello world').decode('ascii')
+
+        response = main.handler(_event('/echo', 'POST', body=encoded, is_base64=True), None)
+
+        data = orjson.loads(response['body'])
+        assert data['body'] == 'hello world'
+        assert data['content_length'] == '11'
+
+    def test_headers_map_to_environ(self, echo_app):
+        """Test request headers, query string and source IP reach the environ"""
+        headers = {'content-type': 'application/json', 'x-custom-header': 'abc'}
+
+        response = main.handler(_event('/echo', headers=headers), None)
+
+        data = orjson.loads(response['body'])
+        assert data['query'] == 'page=2'
+        assert data['content_type'] == 'application/json'
+        assert data['custom'] == 'abc'
+        assert data['remote_addr'] == '203.0.113.7'
+
+    def test_binary_response_is_base64_encoded(self, echo_app):
+        """Test non-text responses are base64 encoded for API Gateway"""
+        response = main.handler(_event('/binary'), None)
+
+        assert response['isBase64Encoded'] is True
+        assert base64.b64decode(response['body']) == b'\x89PNG\x00\xff'
+        assert response['headers']['Content-Type'] == 'image/png'
+
+    def test_status_code_from_status_line(self, echo_app):
+        """Test the status code is parsed from the WSGI status line"""
+        response = main.handler(_event('/created', 'POST'), None)
+
+        assert response['statusCode'] == 201
+
+        response = main.handler(_event('/missing'), None)
+
+        assert response['statusCode'] == 404